@@ -1,127 +1,30 @@
-knowledge_base = [
-{
-        "question": "What is My Corporate School?",
-        "keywords": ["what is", "about", "my corporate school"],
-        "answer": "My Corporate School is an online learning platform dedicated to providing high-quality education and skill development in various fields like IT, Data Science, Digital Marketing, and more."
-    },
-    {
-        "question": "What courses do you offer?",
-        "keywords": ["courses", "programs", "offerings"],
-        "answer": "We offer a wide range of courses including Python Programming, Data Science, Web Development (HTML, CSS, JavaScript), Digital Marketing, and many others."
-    },
-    {
-        "question": "Are the classes online or offline?",
-        "keywords": ["online", "offline", "classes", "mode"],
-        "answer": "All our classes are conducted online, providing flexibility and accessibility to learners from anywhere."
-    },
-    {
-        "question": "How can I enroll in a course?",
-        "keywords": ["enroll", "admission", "register", "join"],
-        "answer": "You can enroll in a course by visiting the specific course page on our website and following the admission process outlined there."
-    },
-    {
-        "question": "Do you provide placement assistance?",
-        "keywords": ["placement", "job", "career", "assistance"],
-        "answer": "Yes, we provide career guidance and placement assistance to help our students achieve their professional goals."
-    },
-    {
-        "question": "How can I contact My Corporate School?",
-        "keywords": ["contact", "reach out", "support", "get in touch"],
-        "answer": "You can contact us via the details provided on our 'Contact Us' page on our website, including email and phone number."
-    },
-    {
-        "question": "What is the Campus to Corporate program?",
-        "keywords": ["campus to corporate", "transition program", "corporate skills", "fresh graduates"],
-        "answer": "It is a transition training program designed for students and fresh graduates to help them develop essential corporate soft skills, communication, and interview readiness."
-    },
-    {
-        "question": "Who should attend the Campus to Corporate program?",
-        "keywords": ["who should attend", "eligible", "suitable", "freshers", "students"],
-        "answer": "Final-year students, recent graduates, and job seekers looking to step confidently into the corporate world."
-    },
-    {
-        "question": "What skills will I learn in Campus to Corporate?",
-        "keywords": ["skills", "learn", "corporate etiquette", "communication", "teamwork", "interview skills"],
-        "answer": "Corporate etiquette, communication, teamwork, leadership, time management, and interview handling."
-    },
-    {
-        "question": "Is placement assistance available?",
-        "keywords": ["placement", "job support", "career help", "recruitment", "interview"],
-        "answer": "We provide interview preparation and connect students to hiring networks, though direct placement depends on individual performance."
-    },
-    {
-        "question": "What types of corporate training do you offer?",
-        "keywords": ["corporate training", "training types", "company sessions", "skills training"],
-        "answer": "We offer leadership, communication, team building, managerial, and professional development training."
-    },
-    {
-        "question": "Can corporate training be customized?",
-        "keywords": ["custom training", "tailor made", "customized sessions", "company specific"],
-        "answer": "Yes, we offer tailor-made training based on the needs and goals of your organization."
-    },
-    {
-        "question": "Are these trainings available online?",
-        "keywords": ["online", "virtual", "remote", "training mode"],
-        "answer": "Yes, we provide both online and on-site training options."
-    },
-    {
-        "question": "Do you provide certification?",
-        "keywords": ["certificate", "certification", "proof of completion"],
-        "answer": "Yes, participants receive completion certificates for most training programs."
-    },
-    {
-        "question": "What is Individual Training?",
-        "keywords": ["individual training", "personal coaching", "one-on-one", "custom session"],
-        "answer": "One-on-one personalized skill-building sessions for professionals or students seeking personal growth and career development."
-    },
-    {
-        "question": "Can I schedule Individual Training sessions based on availability?",
-        "keywords": ["scheduling", "timing", "custom time", "availability"],
-        "answer": "Yes, individual training is flexible and scheduled as per your convenience."
-    },
-    {
-        "question": "What is Life Coaching?",
-        "keywords": ["life coaching", "self improvement", "personal development", "goal setting"],
-        "answer": "Life Coaching focuses on self-awareness, clarity, goal setting, and personal growth in all areas of life including career, relationships, and health."
-    },
-    {
-        "question": "How is life coaching different from therapy?",
-        "keywords": ["therapy", "difference", "counseling vs coaching", "mental health"],
-        "answer": "Unlike therapy, which focuses on healing past trauma, life coaching is action-oriented and future-focused."
-    },
-    {
-        "question": "Who is Executive Coaching for?",
-        "keywords": ["executive", "managers", "leaders", "leadership coaching"],
-        "answer": "Mid to senior-level professionals aiming to enhance their leadership, communication, and strategic decision-making skills."
-    },
-    {
-        "question": "Do you coach department heads or team leaders?",
-        "keywords": ["team leader", "department head", "coaching leaders", "team coaching"],
-        "answer": "Absolutely. We specialize in coaching leaders to become more effective and aligned with organizational goals."
-    },
-    {
-        "question": "How do I enroll in a program?",
-        "keywords": ["enroll", "admission", "register", "join", "apply"],
-        "answer": "Visit our website and navigate to the desired course page, or contact us directly through our inquiry form."
-    },
-    {
-        "question": "Is there a demo or trial available?",
-        "keywords": ["demo", "trial", "sample session", "free session"],
-        "answer": "Demo sessions are available upon request, especially for corporate partnerships."
-    },
-    {
-        "question": "What makes My Corporate School unique?",
-        "keywords": ["unique", "why choose", "difference", "strengths"],
-        "answer": "We believe in experiential learning so that the training is highly interactive and impactful. Since, this gives the trainees a first hand experience of the real world scenario."
-    },
-    {
-        "question": "What is the duration of your programs?",
-        "keywords": ["duration", "length", "how long", "time frame"],
-        "answer": "Depending on the course, durations range from a few days to several weeks."
-    },
-    {
-        "question": "Where are your sessions conducted?",
-        "keywords": ["location", "venue", "where", "session place", "training location"],
-        "answer": "Sessions can be held at your office premises, online via video conferencing, or in our partnered learning centers."
-    }
-]
\ No newline at end of file
+import json
+import os
+
+# FAQ entries live in a data file so they can be edited without a redeploy;
+# gchatbot watches the file and swaps in changes at runtime.
+KNOWLEDGE_BASE_PATH = os.getenv(
+    "KNOWLEDGE_BASE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_base.json"),
+)
+
+
+def load_knowledge_base(path=KNOWLEDGE_BASE_PATH):
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+            kb = yaml.safe_load(f)
+        else:
+            kb = json.load(f)
+
+    if not isinstance(kb, list):
+        raise ValueError(f"{path}: expected a list of FAQ entries")
+    for i, item in enumerate(kb):
+        if not isinstance(item, dict) or not item.get("question") or not item.get("answer"):
+            raise ValueError(f"{path}: entry {i} needs a 'question' and an 'answer'")
+        if not isinstance(item.setdefault("keywords", []), list):
+            raise ValueError(f"{path}: entry {i} 'keywords' must be a list")
+    return kb
+
+
+knowledge_base = load_knowledge_base()
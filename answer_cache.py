@@ -0,0 +1,169 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from kb_index import tokenize
+
+
+def normalize_query(query):
+    # "How do I enroll?" and "how do i enroll" share one cache entry. Queries
+    # with no words at all ("???") normalize to "" and are never cached.
+    return " ".join(tokenize(query))
+
+
+def kb_fingerprint(kb):
+    data = json.dumps(kb, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(data).hexdigest()[:12]
+
+
+# --- Stores ---
+class MemoryCacheStore:
+    """In-process LRU store with a per-entry TTL."""
+
+    def __init__(self, maxsize=1024, ttl=3600, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires <= self.clock():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (self.clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisCacheStore:
+    """Shared store for all gunicorn workers.
+
+    Entries expire through Redis TTLs; the overall size is bounded by the
+    server's ``maxmemory`` with an LRU eviction policy (``allkeys-lru``).
+    Any client exposing ``get``/``set(..., ex=)``/``scan_iter``/``delete``
+    works, so tests can pass a local stand-in.
+    """
+
+    def __init__(self, client, ttl=3600, prefix="gchatbot:answer:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+# --- Cache ---
+class AnswerCache:
+    """Answer cache keyed on the normalized query and the KB version.
+
+    Changing the knowledge base (``set_kb_version``) makes every earlier
+    entry unreachable, and clears the store so stale answers do not linger.
+    ``get`` and ``set`` accept the version of the snapshot a request actually
+    used, so an answer built before a reload is never stored under the new
+    version.
+    """
+
+    def __init__(self, store, kb_version=""):
+        self.store = store
+        self.kb_version = kb_version
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _key(self, query, kb_version=None):
+        normalized = normalize_query(query)
+        if not normalized:
+            return None
+        return f"{self.kb_version if kb_version is None else kb_version}:{normalized}"
+
+    def get(self, query, kb_version=None):
+        key = self._key(query, kb_version)
+        if key is None:
+            return None
+        try:
+            value = self.store.get(key)
+        except Exception as e:
+            print(f"Answer cache error: {e}")
+            value = None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, query, value, kb_version=None):
+        key = self._key(query, kb_version)
+        if key is None:
+            return
+        try:
+            self.store.set(key, value)
+        except Exception as e:
+            print(f"Answer cache error: {e}")
+
+    def set_kb_version(self, kb_version):
+        if kb_version == self.kb_version:
+            return
+        self.kb_version = kb_version
+        try:
+            self.store.clear()
+        except Exception as e:
+            print(f"Answer cache error: {e}")
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.store).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "kb_version": self.kb_version,
+        }
+
+
+def create_answer_cache(kb_version, maxsize=1024, ttl=3600, redis_url=None, redis_timeout=0.1):
+    if redis_url:
+        import redis
+        # Short timeouts: a stalled Redis should cost a cache miss, not the request.
+        client = redis.Redis.from_url(
+            redis_url,
+            socket_timeout=redis_timeout,
+            socket_connect_timeout=redis_timeout,
+        )
+        store = RedisCacheStore(client, ttl=ttl)
+    else:
+        store = MemoryCacheStore(maxsize=maxsize, ttl=ttl)
+    return AnswerCache(store, kb_version=kb_version)
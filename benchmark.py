@@ -0,0 +1,356 @@
+"""Latency and throughput benchmarks for the chatbot backend.
+
+Drives the Flask app with a stub Gemini model, either in-process through the
+Flask test client or against a real gunicorn process, and reports p50/p95/p99
+latency, requests per second and memory per worker.
+
+    python benchmark.py --scenario faq llm mixed --requests 500 --concurrency 16
+    python benchmark.py --server gunicorn --workers 2 --latency 0.8 --jitter 0.3
+    python benchmark.py --scenario mixed --replay requests.jsonl --json bench_output.txt
+    python benchmark.py --scenario faq llm --kb-scale 5000
+
+With --json, one JSON object per scenario is appended to the file, tagged with
+the current git commit so runs can be compared across commits.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-stub-key")
+
+SYNTHETIC_WORDS = [
+    "analytics", "budget", "cloud", "compliance", "design", "excel", "finance", "hiring",
+    "kubernetes", "negotiation", "onboarding", "payroll", "robotics", "sales", "security",
+    "statistics", "storytelling", "supply", "tableau", "writing",
+]
+LLM_WORDS = ["zebra", "volcano", "saxophone", "nebula", "origami", "glacier", "marathon", "quasar"]
+
+
+# --- App Setup ---
+def synthetic_kb(base, size, seed=0):
+    rng = random.Random(seed)
+    kb = list(base)
+    for i in range(size):
+        topic = f"{rng.choice(SYNTHETIC_WORDS)} {rng.choice(SYNTHETIC_WORDS)} {i}"
+        kb.append({
+            "question": f"Do you offer a {topic} workshop?",
+            "keywords": [f"{topic} workshop", f"topic{i}"],
+            "answer": f"Yes, the {topic} workshop runs every quarter with hands-on exercises.",
+        })
+    return kb
+
+
+def configure_app(latency=0.0, jitter=0.0, error_rate=0.0, kb_scale=0, cache=False, seed=None):
+    """Import gchatbot, swap in the stub model and optionally grow the KB."""
+    import gchatbot
+    from answer_cache import AnswerCache, MemoryCacheStore
+    from fake_gemini import FakeGeminiModel
+
+    gchatbot.model = FakeGeminiModel(latency=latency, jitter=jitter, error_rate=error_rate, seed=seed)
+    if kb_scale:
+        gchatbot.kb_watcher.set_kb(synthetic_kb(gchatbot.kb_watcher.state.kb, kb_scale))
+    if not cache:
+        # A zero-sized store misses every time, so each LLM request reaches the stub.
+        gchatbot.answer_cache = AnswerCache(MemoryCacheStore(maxsize=0))
+    # Fit the retriever before measuring, so the first LLM requests do not
+    # include the one-off scikit-learn import and TF-IDF fit.
+    gchatbot.kb_watcher.state.retriever
+    return gchatbot.app
+
+
+def create_app():
+    """Gunicorn entry point: ``gunicorn "benchmark:create_app()"``."""
+    return configure_app(
+        latency=float(os.getenv("BENCH_LATENCY", 0)),
+        jitter=float(os.getenv("BENCH_JITTER", 0)),
+        error_rate=float(os.getenv("BENCH_ERROR_RATE", 0)),
+        kb_scale=int(os.getenv("BENCH_KB_SCALE", 0)),
+        cache=os.getenv("BENCH_CACHE") == "1",
+    )
+
+
+# --- Scenarios ---
+def faq_messages(kb, rng):
+    faq = rng.choice(kb)
+    return rng.choice([faq["question"], rng.choice(faq["keywords"])])
+
+
+def llm_message(rng, i):
+    # Unique nonsense questions never hit the FAQ index, the cache or the coalescer.
+    return f"explain {rng.choice(LLM_WORDS)} {rng.choice(LLM_WORDS)} number {i}"
+
+
+def load_replay(path):
+    messages = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                messages.append(record)
+            else:
+                messages.append(record.get("message") or record.get("title") or record.get("body"))
+    return [m for m in messages if m]
+
+
+def build_messages(scenario, count, kb, replay=None, llm_ratio=0.3, seed=0):
+    rng = random.Random(seed)
+    if scenario == "faq":
+        return [faq_messages(kb, rng) for _ in range(count)]
+    if scenario == "llm":
+        return [llm_message(rng, i) for i in range(count)]
+    if scenario == "mixed":
+        if replay:
+            source = load_replay(replay)
+            return [source[i % len(source)] for i in range(count)]
+        return [
+            llm_message(rng, i) if rng.random() < llm_ratio else faq_messages(kb, rng)
+            for i in range(count)
+        ]
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+
+# --- Load Generation ---
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    # Nearest-rank percentile.
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def run_load(send, messages, concurrency):
+    """Send every message using ``concurrency`` threads; returns (latencies, statuses, elapsed)."""
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    queue = iter(enumerate(messages))
+
+    def worker():
+        while True:
+            with lock:
+                item = next(queue, None)
+            if item is None:
+                return
+            start = time.perf_counter()
+            try:
+                status = send(item[1])
+            except Exception:
+                status = "error"
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, statuses, time.perf_counter() - started
+
+
+def testclient_sender(app, path):
+    local = threading.local()
+
+    def send(message):
+        if not hasattr(local, "client"):
+            local.client = app.test_client()
+        response = local.client.post(path, json={"message": message})
+        response.get_data()
+        return response.status_code
+
+    return send
+
+
+def http_sender(base_url, path):
+    def send(message):
+        body = json.dumps({"message": message}).encode("utf-8")
+        req = urllib.request.Request(base_url + path, data=body, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(req, timeout=60) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    return send
+
+
+# --- Memory ---
+def rss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def child_pids(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+# --- Gunicorn ---
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(args):
+    port = free_port()
+    env = dict(
+        os.environ,
+        BENCH_LATENCY=str(args.latency),
+        BENCH_JITTER=str(args.jitter),
+        BENCH_ERROR_RATE=str(args.error_rate),
+        BENCH_KB_SCALE=str(args.kb_scale),
+        BENCH_CACHE="1" if args.cache else "0",
+    )
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "gunicorn", "benchmark:create_app()",
+            "--bind", f"127.0.0.1:{port}",
+            "--workers", str(args.workers),
+            "--worker-class", "gthread",
+            "--threads", str(args.threads),
+            "--log-level", "warning",
+        ],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup")
+        try:
+            with urllib.request.urlopen(base_url + "/", timeout=1):
+                return process, base_url
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn did not start within 60s")
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# --- Reporting ---
+def summarize(scenario, args, latencies, statuses, elapsed, memory):
+    ordered = sorted(latencies)
+    ms = lambda v: round(v * 1000, 2) if v is not None else None
+    return {
+        "scenario": scenario,
+        "server": args.server,
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "requests": len(latencies),
+        "concurrency": args.concurrency,
+        "kb_size": args.kb_base_size + args.kb_scale,
+        "stub": {"latency": args.latency, "jitter": args.jitter, "error_rate": args.error_rate},
+        "statuses": {str(k): v for k, v in statuses.items()},
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "p50_ms": ms(percentile(ordered, 50)),
+        "p95_ms": ms(percentile(ordered, 95)),
+        "p99_ms": ms(percentile(ordered, 99)),
+        "max_ms": ms(ordered[-1] if ordered else None),
+        "memory_per_worker_kb": memory,
+    }
+
+
+def print_summary(result):
+    print(
+        f"{result['scenario']:<7} {result['server']:<10} kb={result['kb_size']:<6} "
+        f"n={result['requests']:<6} rps={result['rps']:<9} "
+        f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms "
+        f"mem/worker={result['memory_per_worker_kb']}KB statuses={result['statuses']}"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", nargs="+", default=["faq", "llm", "mixed"], choices=["faq", "llm", "mixed"])
+    parser.add_argument("--server", default="testclient", choices=["testclient", "gunicorn"])
+    parser.add_argument("--path", default="/chat", help="Route to drive, e.g. /chat or /chat/stream")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub Gemini latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Uniform +/- jitter in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--kb-scale", type=int, default=0, help="Synthetic entries added to the KB")
+    parser.add_argument("--replay", help="JSONL file of messages for the mixed scenario")
+    parser.add_argument("--llm-ratio", type=float, default=0.3, help="LLM share of synthetic mixed traffic")
+    parser.add_argument("--cache", action="store_true", help="Keep the answer cache enabled")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Append one JSON result per scenario to this file")
+    args = parser.parse_args(argv)
+
+    from Knowledge_Base import knowledge_base
+    args.kb_base_size = len(knowledge_base)
+    kb = synthetic_kb(knowledge_base, args.kb_scale)
+
+    process = None
+    if args.server == "gunicorn":
+        process, base_url = start_gunicorn(args)
+        send = http_sender(base_url, args.path)
+    else:
+        app = configure_app(args.latency, args.jitter, args.error_rate, args.kb_scale, args.cache, args.seed)
+        send = testclient_sender(app, args.path)
+
+    results = []
+    try:
+        for scenario in args.scenario:
+            messages = build_messages(scenario, args.requests, kb, args.replay, args.llm_ratio, args.seed)
+            latencies, statuses, elapsed = run_load(send, messages, args.concurrency)
+            if process:
+                memory = [rss_kb(pid) for pid in child_pids(process.pid)]
+            else:
+                memory = [resource.getrusage(resource.RUSAGE_SELF).ru_maxrss]
+            result = summarize(scenario, args, latencies, statuses, elapsed, memory)
+            print_summary(result)
+            results.append(result)
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import threading
+from concurrent.futures import Future
+
+
+class RequestCoalescer:
+    """Shares one in-flight call between concurrent callers with the same key.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait on its result instead of issuing their own call.
+    Results and exceptions both reach every waiter. A waiter that gives up
+    after ``timeout`` seconds gets ``concurrent.futures.TimeoutError`` while
+    the leader keeps running. The futures are thread-safe, and asyncio code
+    can await them with ``asyncio.wrap_future``.
+
+    Each waiter holds a worker thread, so at most ``max_waiters_per_key``
+    callers wait on one key and ``max_waiters`` in total. Callers past either
+    cap run ``fn`` themselves, as if there were no coalescer.
+    """
+
+    def __init__(self, max_waiters=4, max_waiters_per_key=2):
+        self.max_waiters = max_waiters
+        self.max_waiters_per_key = max_waiters_per_key
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._waiters = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.overflow = 0
+
+    def run(self, key, fn, timeout=None):
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            overflow = False
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+                self.leaders += 1
+            else:
+                waiting = sum(self._waiters.values())
+                overflow = waiting >= self.max_waiters or self._waiters.get(key, 0) >= self.max_waiters_per_key
+                if overflow:
+                    self.overflow += 1
+                else:
+                    self._waiters[key] = self._waiters.get(key, 0) + 1
+                    self.coalesced += 1
+
+        if overflow:
+            return fn()
+
+        if not leader:
+            try:
+                return future.result(timeout=timeout)
+            finally:
+                with self._lock:
+                    self._waiters[key] -= 1
+                    if not self._waiters[key]:
+                        del self._waiters[key]
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return future.result()
+
+    def stats(self):
+        return {
+            "coalesce_leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesce_waiting": sum(self._waiters.values()),
+            "coalesce_overflow": self.overflow,
+        }
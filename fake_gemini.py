@@ -0,0 +1,74 @@
+import random
+import threading
+import time
+import types
+
+
+class FakeGeminiError(Exception):
+    pass
+
+
+class FakeGeminiTimeout(FakeGeminiError):
+    """Raised like the SDK does when ``request_options["timeout"]`` runs out."""
+
+
+def fake_response(text):
+    part = types.SimpleNamespace(text=text)
+    content = types.SimpleNamespace(parts=[part])
+    return types.SimpleNamespace(candidates=[types.SimpleNamespace(content=content)], text=text)
+
+
+class FakeGeminiModel:
+    """Stand-in for ``genai.GenerativeModel`` with no network access.
+
+    Each call sleeps for ``latency`` seconds plus or minus up to ``jitter``
+    and fails with ``FakeGeminiError`` with probability ``error_rate``.
+    Streaming calls spread the same delay over ``chunks`` pieces. As with the
+    real SDK, ``request_options["timeout"]`` bounds the whole call, streams
+    included: once it runs out the call ends in ``FakeGeminiTimeout``.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, answer="This is a stub answer.", chunks=4, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.answer = answer
+        self.chunks = max(1, chunks)
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _delay_and_outcome(self):
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            fail = self.random.random() < self.error_rate
+        return delay, fail
+
+    def generate_content(self, prompt, stream=False, request_options=None, **kwargs):
+        delay, fail = self._delay_and_outcome()
+        timeout = (request_options or {}).get("timeout")
+        if stream:
+            return self._stream(delay, fail, timeout, time.monotonic())
+        self._sleep(delay, timeout)
+        if fail:
+            raise FakeGeminiError("Injected Gemini failure")
+        return fake_response(self.answer)
+
+    @staticmethod
+    def _sleep(delay, timeout):
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise FakeGeminiTimeout("Request timeout exceeded")
+        time.sleep(delay)
+
+    def _stream(self, delay, fail, timeout, start):
+        words = self.answer.split(" ")
+        size = max(1, -(-len(words) // self.chunks))
+        pieces = [" ".join(words[i:i + size]) + " " for i in range(0, len(words), size)]
+        for i, piece in enumerate(pieces):
+            remaining = None if timeout is None else max(0.0, timeout - (time.monotonic() - start))
+            self._sleep(delay / len(pieces), remaining)
+            if fail and i == len(pieces) // 2:
+                raise FakeGeminiError("Injected Gemini failure")
+            yield fake_response(piece)
@@ -1,46 +1,175 @@
 import os
+import json
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+from contextlib import closing
 import Knowledge_Base
-from Knowledge_Base import knowledge_base
-import google.generativeai as genai
-from flask import Flask, request, jsonify
+from Knowledge_Base import KNOWLEDGE_BASE_PATH, load_knowledge_base
+from knowledge_state import KnowledgeWatcher
+from retrieval import estimate_tokens
+from answer_cache import create_answer_cache, normalize_query
+from gemini_limiter import GeminiBusy, GeminiLimiter
+from coalescer import RequestCoalescer
+from gemini_guard import CircuitBreaker, CircuitOpen, DeadlineExceeded, GeminiGuard
+from metrics import Registry, StageTimer
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 
-# --- 1. Knowledge Base Formatting (Helper Function) ---
-def format_knowledge_base(kb):
-    return "\n\n".join([f"Q: {item['question']}\nA: {item['answer']}" for item in kb])
-
-kb_string = format_knowledge_base(knowledge_base)
-
-# --- 2. Load Environment Variables ---
+# --- 1. Load Environment Variables ---
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+KB_TOP_K = int(os.getenv("KB_TOP_K", 5))
+KB_TOKEN_BUDGET = int(os.getenv("KB_TOKEN_BUDGET", 1500))
+KB_RELOAD_INTERVAL = float(os.getenv("KB_RELOAD_INTERVAL", 5))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", 1024))
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", 3600))
+REDIS_URL = os.getenv("REDIS_URL")
+REDIS_TIMEOUT = float(os.getenv("REDIS_TIMEOUT", 0.1))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", 8))
+GEMINI_QUEUE_TIMEOUT = float(os.getenv("GEMINI_QUEUE_TIMEOUT", 0.25))
+GEMINI_DEADLINE = float(os.getenv("GEMINI_DEADLINE", 10))
+# The SDK timeout on a streaming call bounds the whole stream, not each chunk,
+# so it is a separate, longer limit; GEMINI_DEADLINE covers the gaps.
+GEMINI_STREAM_TIMEOUT = float(os.getenv("GEMINI_STREAM_TIMEOUT", 60))
+# Waiting on a coalesced call never outlasts the deadline of the call itself.
+GEMINI_COALESCE_TIMEOUT = min(float(os.getenv("GEMINI_COALESCE_TIMEOUT", GEMINI_DEADLINE)), GEMINI_DEADLINE)
+# Keep in step with gunicorn's --threads. Half of the threads the Gemini
+# limiter leaves spare may wait on coalesced calls; the rest stay free for FAQs.
+GUNICORN_THREADS = int(os.getenv("GUNICORN_THREADS", 16))
+GEMINI_COALESCE_MAX_WAITERS = int(os.getenv(
+    "GEMINI_COALESCE_MAX_WAITERS", max(1, (GUNICORN_THREADS - GEMINI_MAX_CONCURRENCY) // 2)
+))
+GEMINI_COALESCE_MAX_WAITERS_PER_KEY = int(os.getenv("GEMINI_COALESCE_MAX_WAITERS_PER_KEY", GEMINI_COALESCE_MAX_WAITERS))
+GEMINI_HEDGE = os.getenv("GEMINI_HEDGE", "0") == "1"
+GEMINI_HEDGE_DELAY = float(os.getenv("GEMINI_HEDGE_DELAY", 2))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", 5))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", 30))
+# Fallback answers below this retrieval score get FALLBACK_MESSAGE instead.
+FALLBACK_MIN_SCORE = float(os.getenv("FALLBACK_MIN_SCORE", 0.2))
 
 if not GEMINI_API_KEY:
     print("Error: GEMINI_API_KEY not set. Please set it in your environment variables.")
     exit()
 
-try:
-    genai.configure(api_key=GEMINI_API_KEY)
-    print("Gemini API configured successfully.")
-except Exception as e:
-    print(f"Error configuring Gemini API: {e}")
-    exit()
+# --- 2. Initialize Gemini Model ---
+# The SDK import and model construction are deferred to the first LLM-bound
+# request, so a cold instance can answer FAQ questions right away.
+model = None
+_model_lock = threading.Lock()
 
-# --- 3. Initialize Gemini Model ---
-model = genai.GenerativeModel('gemini-1.5-flash-latest')
+def get_model():
+    global model
+    if model is None:
+        with _model_lock:
+            if model is None:
+                import google.generativeai as genai
+                genai.configure(api_key=GEMINI_API_KEY)
+                print("Gemini API configured successfully.")
+                model = genai.GenerativeModel('gemini-1.5-flash-latest')
+    return model
 
-# --- 4. Chatbot Logic ---
-def get_chatbot_response(user_query):
-    lower_case_query = user_query.lower()
-    for faq in knowledge_base:
-        if any(keyword in lower_case_query for keyword in faq["keywords"]) or lower_case_query in faq["question"].lower():
-            return faq["answer"]
+# The knowledge base file is re-read when it changes; the keyword index is
+# rebuilt from it and the answer cache moves to the new KB version.
+def on_knowledge_base_change(state):
+    Knowledge_Base.knowledge_base = state.kb
+    answer_cache.set_kb_version(state.fingerprint)
+    print(f"Knowledge base reloaded: {len(state.kb)} entries.")
 
-    try:
-        kb_context = format_knowledge_base(knowledge_base)
-        prompt = f"""
+kb_watcher = KnowledgeWatcher(
+    KNOWLEDGE_BASE_PATH,
+    load_knowledge_base,
+    kb=Knowledge_Base.knowledge_base,
+    on_change=on_knowledge_base_change,
+    interval=KB_RELOAD_INTERVAL,
+)
+
+# Gemini answers keyed on the normalized query; set REDIS_URL to share it across workers.
+answer_cache = create_answer_cache(
+    kb_watcher.state.fingerprint,
+    maxsize=ANSWER_CACHE_SIZE,
+    ttl=ANSWER_CACHE_TTL,
+    redis_url=REDIS_URL,
+    redis_timeout=REDIS_TIMEOUT,
+)
+
+# Bounds concurrent Gemini calls per worker; keep it below gunicorn's --threads
+# so FAQ requests always find a free thread.
+gemini_limiter = GeminiLimiter(
+    max_concurrency=GEMINI_MAX_CONCURRENCY,
+    queue_timeout=GEMINI_QUEUE_TIMEOUT,
+)
+
+# Concurrent identical questions share one Gemini call. Waiters hold a thread,
+# so GEMINI_MAX_CONCURRENCY + GEMINI_COALESCE_MAX_WAITERS stays below --threads;
+# duplicates past the caps call Gemini themselves through the limiter.
+gemini_coalescer = RequestCoalescer(
+    max_waiters=GEMINI_COALESCE_MAX_WAITERS,
+    max_waiters_per_key=GEMINI_COALESCE_MAX_WAITERS_PER_KEY,
+)
+
+# Deadline, optional hedged retry and circuit breaker around each Gemini call;
+# when it gives up, the best local knowledge base answer is served instead.
+gemini_guard = GeminiGuard(
+    deadline=GEMINI_DEADLINE,
+    hedge=GEMINI_HEDGE,
+    hedge_delay=GEMINI_HEDGE_DELAY,
+    breaker=CircuitBreaker(failure_threshold=BREAKER_FAILURES, reset_timeout=BREAKER_RESET_TIMEOUT),
+    limiter=gemini_limiter,
+    max_workers=GEMINI_MAX_CONCURRENCY,
+)
+
+# Per-worker metrics served on /metrics; stage timings also go out as Server-Timing.
+metrics = Registry()
+timer = StageTimer(metrics.histogram("chatbot_stage_seconds", "Time spent in each request stage.", ["stage"]))
+requests_total = metrics.counter("chatbot_requests_total", "HTTP requests by route and status.", ["route", "status"])
+answers_total = metrics.counter("chatbot_answers_total", "Answers by where they came from (faq, cache, llm).", ["path"])
+gemini_errors_total = metrics.counter("chatbot_gemini_errors_total", "Gemini calls that failed or returned no text.")
+fallbacks_total = metrics.counter("chatbot_fallbacks_total", "Local fallback answers by reason.", ["reason"])
+prompt_chars = metrics.histogram(
+    "chatbot_prompt_chars", "Size of Gemini prompts in characters.",
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000),
+)
+prompt_tokens = metrics.histogram(
+    "chatbot_prompt_tokens", "Estimated size of Gemini prompts in tokens.",
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384),
+)
+
+def faq_hit_ratio():
+    total = sum(answers_total.value(path=p) for p in ("faq", "cache", "llm"))
+    return answers_total.value(path="faq") / total if total else 0.0
+
+metrics.callback("chatbot_faq_hit_ratio", "Share of answers served from the FAQ index.", faq_hit_ratio)
+metrics.callback("chatbot_answer_cache_hits_total", "Answer cache hits.", lambda: answer_cache.hits, kind="counter")
+metrics.callback("chatbot_answer_cache_misses_total", "Answer cache misses.", lambda: answer_cache.misses, kind="counter")
+metrics.callback("chatbot_gemini_in_flight", "Gemini calls currently in flight.", lambda: gemini_limiter.in_flight)
+metrics.callback("chatbot_gemini_rejected_total", "Requests rejected by the Gemini limiter.", lambda: gemini_limiter.rejected, kind="counter")
+metrics.callback(
+    "chatbot_gemini_breaker_open", "1 while the Gemini circuit breaker is open or half-open.",
+    lambda: 0 if gemini_guard.breaker.state == CircuitBreaker.CLOSED else 1,
+)
+metrics.callback("chatbot_gemini_breaker_opens_total", "Times the Gemini circuit breaker opened.", lambda: gemini_guard.breaker.opens, kind="counter")
+metrics.callback("chatbot_gemini_hedges_total", "Hedged Gemini requests issued.", lambda: gemini_guard.hedges, kind="counter")
+metrics.callback("chatbot_gemini_deadline_exceeded_total", "Gemini calls that missed the deadline.", lambda: gemini_guard.deadline_exceeded, kind="counter")
+metrics.callback("chatbot_kb_entries", "Entries in the current knowledge base.", lambda: len(kb_watcher.state.kb))
+metrics.callback("chatbot_kb_reloads_total", "Knowledge base reloads.", lambda: kb_watcher.reloads, kind="counter")
+metrics.callback("chatbot_gemini_coalesced_total", "Gemini calls saved by coalescing.", lambda: gemini_coalescer.coalesced, kind="counter")
+metrics.callback("chatbot_gemini_coalesce_overflow_total", "Duplicate requests past the waiter caps that called Gemini themselves.", lambda: gemini_coalescer.overflow, kind="counter")
+
+# --- 3. Chatbot Logic ---
+TROUBLE_MESSAGE = "I'm having trouble connecting right now. Please try again later."
+ERROR_MESSAGE = "Oops! Something went wrong. Please try again."
+FALLBACK_MESSAGE = "I can't reach our assistant right now. Please visit our website for more details."
+
+# Builds the Gemini prompt from the top-k retrieved entries; returns (prompt, sources).
+def build_prompt(user_query, state):
+    retriever = state.retriever
+    positions = retriever.top_k(user_query, k=KB_TOP_K, token_budget=KB_TOKEN_BUDGET)
+    sources = [retriever.kb[pos]["question"] for pos in positions]
+    kb_context = retriever.build_context(positions)
+    prompt = f"""
 Context:
 {kb_context}
 
@@ -48,21 +177,172 @@ Question: {user_query}
 
 If not found, suggest visiting the website.
 """
-        response = model.generate_content(prompt)
+    prompt_chars.observe(len(prompt))
+    prompt_tokens.observe(estimate_tokens(prompt))
+    return prompt, sources
+
+def extract_text(response):
+    if response.candidates and response.candidates[0].content and response.candidates[0].content.parts:
+        return response.candidates[0].content.parts[0].text
+    return None
+
+# Answers that need no Gemini call (FAQ hit or cached answer), else None.
+# Each request reads kb_watcher.state once and passes that snapshot along, so
+# a reload midway cannot mix knowledge base versions in one answer.
+def get_local_response(user_query, state):
+    with timer.stage("match"):
+        match = state.index.best_match(user_query)
+    if match:
+        answers_total.inc(path="faq")
+        return match[0]["answer"], [match[0]["question"]]
+
+    with timer.stage("cache"):
+        cached = answer_cache.get(user_query, kb_version=state.fingerprint)
+    if cached:
+        answers_total.inc(path="cache")
+        return cached["response"], cached["sources"]
+    return None
+
+# Best-scoring local entry for questions Gemini could not answer in time.
+def get_fallback_response(user_query, reason, state):
+    fallbacks_total.inc(reason=reason)
+    try:
+        retriever = state.retriever
+        positions = retriever.top_k(user_query, k=1, min_score=FALLBACK_MIN_SCORE)
+    except Exception as e:
+        print(f"Fallback lookup error: {e}")
+        return ERROR_MESSAGE, [], reason
+    if positions:
+        item = retriever.kb[positions[0]]
+        return item["answer"], [item["question"]], reason
+    return FALLBACK_MESSAGE, [], reason
+
+# The guard takes a limiter slot for each upstream call, hedges included.
+def generate_answer(prompt):
+    response = gemini_guard.call(
+        lambda: get_model().generate_content(prompt, request_options={"timeout": GEMINI_DEADLINE})
+    )
+    return extract_text(response)
+
+# Returns (answer text, questions of the knowledge base entries it was based on,
+# fallback reason or None when the answer did not come from a local fallback).
+# Raises GeminiBusy when every Gemini slot is taken.
+def get_chatbot_response(user_query):
+    state = kb_watcher.state
+    local = get_local_response(user_query, state)
+    if local:
+        return local[0], local[1], None
+
+    try:
+        with timer.stage("prompt"):
+            prompt, sources = build_prompt(user_query, state)
+        # Queries with no words ("???") coalesce only on the exact prompt.
+        key = (state.fingerprint, normalize_query(user_query) or prompt, tuple(sources))
+        with timer.stage("gemini"):
+            text = gemini_coalescer.run(key, lambda: generate_answer(prompt), timeout=GEMINI_COALESCE_TIMEOUT)
 
-        if response.candidates and response.candidates[0].content and response.candidates[0].content.parts:
-            return response.candidates[0].content.parts[0].text
+        if text:
+            answers_total.inc(path="llm")
+            answer_cache.set(user_query, {"response": text, "sources": sources}, kb_version=state.fingerprint)
+            return text, sources, None
         else:
-            return "I'm having trouble connecting right now. Please try again later."
+            gemini_errors_total.inc()
+            return TROUBLE_MESSAGE, [], None
 
+    except GeminiBusy:
+        raise
+    except CircuitOpen:
+        return get_fallback_response(user_query, "breaker_open", state)
+    except FutureTimeout:
+        # This request gave up waiting on a coalesced call; no Gemini call failed.
+        return get_fallback_response(user_query, "deadline", state)
+    except DeadlineExceeded as e:
+        print(f"Gemini API error: {e}")
+        gemini_errors_total.inc()
+        return get_fallback_response(user_query, "deadline", state)
     except Exception as e:
         print(f"Gemini API error: {e}")
-        return "Oops! Something went wrong. Please try again."
+        gemini_errors_total.inc()
+        return get_fallback_response(user_query, "error", state)
+
+# Yields {"text": ...} events as Gemini produces them, ending with one that
+# carries "done" and "sources" (and "error" if the stream broke off midway, or
+# "fallback" with the reason if Gemini was skipped or failed before any text).
+# FAQ and cache hits are a single final event.
+# GEMINI_DEADLINE applies to the first chunk and to each gap between chunks,
+# and GEMINI_STREAM_TIMEOUT to the whole stream; if nothing arrived yet, a
+# local fallback answer is sent instead.
+# Raises GeminiBusy before the first event when every Gemini slot is taken.
+def stream_chatbot_response(user_query):
+    state = kb_watcher.state
+    local = get_local_response(user_query, state)
+    if local:
+        yield {"text": local[0], "sources": local[1], "done": True}
+        return
+
+    parts = []
+    try:
+        with timer.stage("prompt"):
+            prompt, sources = build_prompt(user_query, state)
+        chunks = gemini_guard.stream(
+            lambda: get_model().generate_content(prompt, stream=True, request_options={"timeout": GEMINI_STREAM_TIMEOUT})
+        )
+        with closing(chunks), timer.stage("gemini"):
+            for chunk in chunks:
+                text = extract_text(chunk)
+                if text:
+                    parts.append(text)
+                    yield {"text": text}
+    except GeminiBusy:
+        raise
+    except Exception as e:
+        if isinstance(e, CircuitOpen):
+            reason = "breaker_open"
+        else:
+            print(f"Gemini API error: {e}")
+            gemini_errors_total.inc()
+            reason = "deadline" if isinstance(e, DeadlineExceeded) else "error"
+        if parts:
+            # The answer so far is incomplete; tell the client instead of ending quietly.
+            yield {"text": "", "sources": [], "done": True, "error": True}
+        else:
+            text, sources, reason = get_fallback_response(user_query, reason, state)
+            yield {"text": text, "sources": sources, "done": True, "fallback": reason}
+        return
+
+    if not parts:
+        gemini_errors_total.inc()
+        yield {"text": TROUBLE_MESSAGE, "sources": [], "done": True}
+        return
+
+    answers_total.inc(path="llm")
+    answer_cache.set(user_query, {"response": "".join(parts), "sources": sources}, kb_version=state.fingerprint)
+    yield {"text": "", "sources": sources, "done": True}
 
-# --- 5. Flask Setup ---
+# --- 4. Flask Setup ---
 app = Flask(__name__)
 CORS(app)
 
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+    kb_watcher.maybe_reload()
+
+@app.after_request
+def add_server_timing(response):
+    if "request_start" in g:
+        timer.record("total", time.perf_counter() - g.request_start)
+    requests_total.inc(route=request.url_rule.rule if request.url_rule else "unmatched", status=response.status_code)
+    header = timer.header()
+    if header:
+        response.headers["Server-Timing"] = header
+    return response
+
+def busy_response():
+    response = jsonify({"error": "The assistant is busy right now. Please try again in a moment."})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
 @app.route('/')
 def index():
     return "<h2>My Corporate School Chatbot Backend is Running.</h2><p>Send a POST request to <code>/chat</code> with JSON: {'message': 'your question'}.</p>"
@@ -73,10 +353,58 @@ def chat():
     if not user_message:
         return jsonify({"error": "No message provided"}), 400
 
-    response_text = get_chatbot_response(user_message)
-    return jsonify({"response": response_text})
+    try:
+        response_text, sources, fallback = get_chatbot_response(user_message)
+    except GeminiBusy:
+        return busy_response()
+    with timer.stage("serialize"):
+        payload = {"response": response_text, "sources": sources}
+        if fallback:
+            payload["fallback"] = fallback
+        return jsonify(payload)
+
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    user_message = request.json.get('message')
+    if not user_message:
+        return jsonify({"error": "No message provided"}), 400
+
+    # Pull the first event here so a saturated limiter still becomes a 503.
+    stream = stream_chatbot_response(user_message)
+    try:
+        first = next(stream)
+    except GeminiBusy:
+        return busy_response()
+
+    def events():
+        yield f"data: {json.dumps(first)}\n\n"
+        for event in stream:
+            yield f"data: {json.dumps(event)}\n\n"
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.route('/cache/stats')
+def cache_stats():
+    return jsonify(answer_cache.stats())
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/gemini/stats')
+def gemini_stats():
+    return jsonify({
+        **gemini_limiter.stats(),
+        **gemini_coalescer.stats(),
+        **gemini_guard.stats(),
+        "fallbacks": {reason: fallbacks_total.value(reason=reason) for reason in ("breaker_open", "deadline", "error")},
+    })
 
-# --- 6. Main Execution ---
+# --- 5. Main Execution ---
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 5000))
     app.run(host='0.0.0.0', port=port)
\ No newline at end of file
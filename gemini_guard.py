@@ -0,0 +1,267 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+
+_END = object()
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling Gemini while the breaker is open."""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when no Gemini call finished within the request deadline."""
+
+
+class CircuitBreaker:
+    """Stops calling Gemini after ``failure_threshold`` consecutive failures.
+
+    After ``reset_timeout`` seconds one trial call is let through (half-open);
+    its outcome closes the breaker again or re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opens = 0
+        self.rejected = 0
+        self._changed_at = clock()
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            # An open breaker, or a half-open trial that never reported back,
+            # lets one new trial through once the reset timeout has passed.
+            if self.clock() - self._changed_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._changed_at = self.clock()
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opens += 1
+                self.state = self.OPEN
+                self._changed_at = self.clock()
+
+    def stats(self):
+        return {
+            "breaker_state": self.state,
+            "breaker_failures": self.failures,
+            "breaker_opens": self.opens,
+            "breaker_rejected": self.rejected,
+        }
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies."""
+
+    def __init__(self, window=200, min_samples=20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct):
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+class GeminiGuard:
+    """Runs Gemini calls under a deadline, with optional hedging and a breaker.
+
+    Calls run on a small thread pool so the caller can stop waiting when the
+    deadline passes; the stalled call itself is bounded by the SDK timeout.
+    With ``hedge`` enabled, a second identical call is issued once the first
+    has been outstanding for the observed p95 latency (or ``hedge_delay``
+    until enough samples exist), and whichever finishes first wins. A call
+    that fails before the hedge point is retried the same way.
+
+    With a ``limiter``, every upstream call holds its own slot until the call
+    itself finishes, even if the caller stopped waiting for it. The first
+    call waits for a slot (``GeminiBusy`` if none frees up); a hedge or retry
+    is skipped when no slot is free right away.
+    """
+
+    def __init__(self, deadline=10.0, hedge=False, hedge_delay=2.0, min_hedge_delay=0.1,
+                 breaker=None, latencies=None, limiter=None, max_workers=16, clock=time.monotonic):
+        self.deadline = deadline
+        self.hedge = hedge
+        self.initial_hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies = latencies or LatencyTracker()
+        self.limiter = limiter
+        self.clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gemini")
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedges = 0
+        self.hedges_skipped = 0
+        self.deadline_exceeded = 0
+
+    def hedge_delay(self):
+        p95 = self.latencies.percentile(95)
+        if p95 is None:
+            return self.initial_hedge_delay
+        return max(self.min_hedge_delay, p95)
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _submit(self, fn, wait_for_slot=True):
+        """Start ``fn`` on the pool holding a limiter slot; None if no slot was free."""
+        if self.limiter is not None:
+            if wait_for_slot:
+                self.limiter.acquire()
+            elif not self.limiter.try_acquire():
+                return None
+        try:
+            future = self._executor.submit(fn)
+        except BaseException:
+            if self.limiter is not None:
+                self.limiter.release()
+            raise
+        if self.limiter is not None:
+            future.add_done_callback(lambda _: self.limiter.release())
+        return future
+
+    def _hedge(self, pending, fn):
+        future = self._submit(fn, wait_for_slot=False)
+        if future is None:
+            self._count("hedges_skipped")
+            return
+        self._count("hedges")
+        pending.add(future)
+
+    def call(self, fn):
+        if not self.breaker.allow():
+            raise CircuitOpen("Gemini circuit breaker is open")
+        self._count("calls")
+
+        start = self.clock()
+        deadline_at = start + self.deadline
+        hedge_at = start + self.hedge_delay()
+        pending = {self._submit(fn)}
+        hedged = False
+        last_error = None
+
+        while True:
+            if not pending:
+                if self.hedge and not hedged:
+                    hedged = True
+                    self._hedge(pending, fn)
+                if not pending:
+                    self.breaker.record_failure()
+                    raise last_error
+
+            now = self.clock()
+            if now >= deadline_at:
+                break
+            timeout = deadline_at - now
+            if self.hedge and not hedged:
+                timeout = min(timeout, max(0.0, hedge_at - now))
+
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    self.latencies.add(self.clock() - start)
+                    self.breaker.record_success()
+                    return future.result()
+                last_error = error
+
+            if self.hedge and not hedged and pending and self.clock() >= hedge_at:
+                hedged = True
+                self._hedge(pending, fn)
+
+        self._count("deadline_exceeded")
+        self.breaker.record_failure()
+        raise DeadlineExceeded(f"No Gemini response within {self.deadline}s")
+
+    def stream(self, fn):
+        """Yield the chunks of the streaming call ``fn()`` under the deadline.
+
+        The deadline applies to the first chunk and again to every gap
+        between chunks; bounding the stream as a whole is left to the SDK
+        timeout ``fn`` passes. Streams are not hedged. One limiter slot is
+        held for the whole stream and released only once no chunk fetch is
+        still running upstream.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpen("Gemini circuit breaker is open")
+        if self.limiter is not None:
+            self.limiter.acquire()
+        self._count("calls")
+
+        future = None
+        succeeded = False
+        try:
+            deadline_at = self.clock() + self.deadline
+            future = self._executor.submit(lambda: iter(fn()))
+            iterator = self._wait(future, deadline_at)
+            while True:
+                future = self._executor.submit(next, iterator, _END)
+                chunk = self._wait(future, deadline_at)
+                if chunk is _END:
+                    break
+                yield chunk
+                deadline_at = self.clock() + self.deadline
+            succeeded = True
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        finally:
+            if succeeded:
+                self.breaker.record_success()
+            if self.limiter is not None:
+                if future is not None and not future.done():
+                    future.add_done_callback(lambda _: self.limiter.release())
+                else:
+                    self.limiter.release()
+
+    def _wait(self, future, deadline_at):
+        try:
+            return future.result(timeout=max(0.0, deadline_at - self.clock()))
+        except FutureTimeout:
+            self._count("deadline_exceeded")
+            raise DeadlineExceeded(f"No Gemini response within {self.deadline}s") from None
+
+    def stats(self):
+        p95 = self.latencies.percentile(95)
+        return {
+            "deadline": self.deadline,
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedges_skipped": self.hedges_skipped,
+            "deadline_exceeded": self.deadline_exceeded,
+            "latency_p95": p95,
+            **self.breaker.stats(),
+        }
@@ -0,0 +1,60 @@
+import threading
+from contextlib import contextmanager
+
+
+class GeminiBusy(Exception):
+    """Raised when every Gemini slot is taken and the queue wait ran out."""
+
+
+class GeminiLimiter:
+    """Caps the number of concurrent outbound Gemini calls in one worker.
+
+    Requests that cannot get a slot within ``queue_timeout`` seconds fail
+    fast with ``GeminiBusy`` instead of tying up a worker thread, which keeps
+    threads free for FAQ-path requests.
+    """
+
+    def __init__(self, max_concurrency=8, queue_timeout=0.25):
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    def acquire(self):
+        """Take a slot, waiting up to ``queue_timeout``; raises ``GeminiBusy``."""
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise GeminiBusy("Too many Gemini requests in flight")
+        with self._lock:
+            self.in_flight += 1
+
+    def try_acquire(self):
+        """Take a slot only if one is free right now."""
+        if not self._slots.acquire(blocking=False):
+            return False
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,159 @@
+import re
+import unicodedata
+
+# Words that carry no meaning on their own; they still match inside keyword
+# phrases but contribute little to an FAQ's score.
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "am", "be", "do", "does", "did", "can", "could",
+    "i", "me", "my", "you", "your", "we", "our", "us", "it", "its", "this", "that",
+    "what", "which", "who", "whom", "how", "when", "where", "why",
+    "of", "to", "in", "on", "at", "for", "with", "by", "from", "about", "or", "and",
+    "any", "there", "have", "has", "will", "would", "should", "please",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_token(token):
+    # Light plural folding so "courses" finds "course" and "jobs" finds "job".
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def _unicode_words(text):
+    # Letters, digits and combining marks form words, so Devanagari vowel
+    # signs stay inside their word; everything else separates words.
+    words = []
+    current = []
+    for char in text:
+        if unicodedata.category(char)[0] in "LNM":
+            current.append(char)
+        elif current:
+            words.append("".join(current))
+            current = []
+    if current:
+        words.append("".join(current))
+    return words
+
+
+def tokenize(text):
+    text = unicodedata.normalize("NFKC", text).casefold()
+    words = _TOKEN_RE.findall(text) if text.isascii() else _unicode_words(text)
+    return [normalize_token(t) for t in words]
+
+
+def _weight(tokens):
+    content = sum(1 for t in tokens if t not in STOPWORDS)
+    return content if content else 0.5
+
+
+class KeywordIndex:
+    """Token index over the knowledge base keywords and questions.
+
+    Keyword phrases are matched on whole words in a single pass over the
+    query, and every candidate FAQ is scored so the best entry wins instead
+    of the first one in the list.
+    """
+
+    # Larger than any keyword score, so asking an FAQ's exact question wins.
+    QUESTION_BONUS = 100
+
+    def __init__(self, kb, previous=None):
+        self.kb = list(kb)
+        # first token -> [(phrase tokens, faq position, phrase weight)]
+        self._phrases = {}
+        # content token -> {faq position}
+        self._question_tokens = {}
+        self._questions = []
+        # (question, keywords) -> tokenized entry; reused by the next rebuild
+        # so only new or edited entries are tokenized again.
+        self._prepared = {}
+        reuse = previous._prepared if previous is not None else {}
+        for pos, faq in enumerate(self.kb):
+            key = (faq.get("question", ""), tuple(faq.get("keywords", [])))
+            prepared = reuse.get(key) or self._prepare(*key)
+            self._prepared[key] = prepared
+            self._add(pos, prepared)
+
+    @staticmethod
+    def _prepare(question, keywords):
+        phrases = []
+        for keyword in keywords:
+            tokens = tokenize(keyword)
+            if tokens:
+                phrases.append((tokens, _weight(tokens)))
+        return phrases, tokenize(question)
+
+    def _add(self, pos, prepared):
+        phrases, question = prepared
+        for tokens, weight in phrases:
+            self._phrases.setdefault(tokens[0], []).append((tokens, pos, weight))
+        self._questions.append(question)
+        for token in set(question):
+            if token not in STOPWORDS:
+                self._question_tokens.setdefault(token, set()).add(pos)
+
+    def _in_question(self, tokens, pos):
+        question = self._questions[pos]
+        n = len(tokens)
+        return any(question[i:i + n] == tokens for i in range(len(question) - n + 1))
+
+    def _contains_question(self, tokens, pos):
+        question = self._questions[pos]
+        n = len(question)
+        return any(tokens[i:i + n] == question for i in range(len(tokens) - n + 1))
+
+    def scores(self, query):
+        """Return {faq position: score} for every FAQ the query triggers.
+
+        An FAQ needs at least one content word in common with the query;
+        stopword-only phrases such as "what is" add to a score but never
+        trigger an FAQ on their own. A query containing an FAQ's whole
+        question gets ``QUESTION_BONUS`` for that FAQ.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return {}
+
+        keyword_scores = {}
+        content_hits = set()
+        seen = set()
+        for i, token in enumerate(tokens):
+            for phrase, pos, weight in self._phrases.get(token, ()):
+                if tokens[i:i + len(phrase)] == phrase and (pos, tuple(phrase)) not in seen:
+                    seen.add((pos, tuple(phrase)))
+                    keyword_scores[pos] = keyword_scores.get(pos, 0) + weight
+                    if any(t not in STOPWORDS for t in phrase):
+                        content_hits.add(pos)
+
+        overlap = {}
+        for token in set(tokens):
+            for pos in self._question_tokens.get(token, ()):
+                overlap[pos] = overlap.get(pos, 0) + 1
+        content_hits.update(overlap)
+
+        # A query that is itself part of a question ("enroll in a course")
+        # triggers that FAQ even without a keyword hit.
+        triggered = set(keyword_scores)
+        content = [t for t in set(tokens) if t not in STOPWORDS]
+        if content:
+            candidates = set.intersection(*(self._question_tokens.get(t, set()) for t in content))
+            triggered.update(pos for pos in candidates if self._in_question(tokens, pos))
+
+        whole = {pos for pos in overlap if self._contains_question(tokens, pos)}
+        triggered.update(whole)
+
+        return {
+            pos: keyword_scores.get(pos, 0) + overlap.get(pos, 0) + (self.QUESTION_BONUS if pos in whole else 0)
+            for pos in triggered & content_hits
+        }
+
+    def best_match(self, query):
+        """Return (faq, score) for the highest scoring FAQ, or None."""
+        scores = self.scores(query)
+        if not scores:
+            return None
+        # Ties go to the earlier entry, as with the old linear scan.
+        pos = min(scores, key=lambda p: (-scores[p], p))
+        return self.kb[pos], scores[pos]
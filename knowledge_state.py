@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+
+from answer_cache import kb_fingerprint
+from kb_index import KeywordIndex
+
+
+class KnowledgeState:
+    """One knowledge base snapshot and everything derived from it.
+
+    Requests read a single snapshot, so a reload never mixes the index of
+    one version with the retriever of another. The TF-IDF retriever is
+    built on first use, or in the background by ``warm`` after a reload.
+    """
+
+    def __init__(self, kb, previous=None):
+        self.kb = kb
+        self.fingerprint = kb_fingerprint(kb)
+        self.index = KeywordIndex(kb, previous=previous.index if previous is not None else None)
+        self._retriever = None
+        # Kept only until our own retriever exists, to reuse its formatted blocks.
+        self._previous_retriever = previous._retriever if previous is not None else None
+        self._lock = threading.Lock()
+
+    @property
+    def retriever(self):
+        if self._retriever is None:
+            with self._lock:
+                if self._retriever is None:
+                    from retrieval import KnowledgeRetriever
+                    self._retriever = KnowledgeRetriever(self.kb, previous=self._previous_retriever)
+                    self._previous_retriever = None
+        return self._retriever
+
+    def warm(self):
+        """Build the retriever on a background thread."""
+        thread = threading.Thread(target=lambda: self.retriever, name="kb-warm", daemon=True)
+        thread.start()
+        return thread
+
+
+class KnowledgeWatcher:
+    """Reloads the knowledge base file when it changes on disk.
+
+    ``maybe_reload`` is cheap enough to call on every request: it stats the
+    file at most once per ``interval`` seconds. A file that fails to load
+    leaves the current snapshot in place.
+    """
+
+    def __init__(self, path, loader, kb=None, on_change=None, interval=5.0, clock=time.monotonic):
+        self.path = path
+        self.loader = loader
+        self.on_change = on_change
+        self.interval = interval
+        self.clock = clock
+        self.reloads = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._next_check = clock() + interval
+        self._signature = self._stat()
+        self.state = KnowledgeState(kb if kb is not None else loader(path))
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def maybe_reload(self):
+        if self.interval <= 0 or self.clock() < self._next_check:
+            return False
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            self._next_check = self.clock() + self.interval
+            signature = self._stat()
+            if signature is None or signature == self._signature:
+                return False
+            self._signature = signature
+            return self._reload()
+        finally:
+            self._lock.release()
+
+    def reload(self):
+        with self._lock:
+            self._signature = self._stat()
+            return self._reload()
+
+    def _reload(self):
+        try:
+            kb = self.loader(self.path)
+        except Exception as e:
+            self.errors += 1
+            print(f"Knowledge base reload failed, keeping the current version: {e}")
+            return False
+        self.set_kb(kb)
+        return True
+
+    def set_kb(self, kb):
+        state = KnowledgeState(kb, previous=self.state)
+        if state.fingerprint == self.state.fingerprint:
+            return
+        # A single reference assignment, so readers see the old or the new snapshot.
+        self.state = state
+        self.reloads += 1
+        # Fit the new retriever off the request path so the next LLM-bound
+        # request does not pay for it.
+        state.warm()
+        if self.on_change:
+            self.on_change(state)
@@ -0,0 +1,82 @@
+def format_entry(item):
+    return f"Q: {item['question']}\nA: {item['answer']}"
+
+
+def estimate_tokens(text):
+    # Rough Gemini-style estimate: about four characters per token.
+    return max(1, len(text) // 4)
+
+
+class KnowledgeRetriever:
+    """TF-IDF retrieval over the knowledge base for building Gemini prompts.
+
+    Vectors and the formatted Q/A blocks are computed once, so a query only
+    costs one transform and a sparse dot product.
+    """
+
+    def __init__(self, kb, previous=None):
+        # Imported here so processes that only serve FAQ answers never load scikit-learn.
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        self.kb = list(kb)
+        # (question, answer) -> (block, tokens); the next rebuild reuses the
+        # formatted blocks of unchanged entries. The TF-IDF fit itself is
+        # global (IDF depends on every entry), so it is always redone.
+        self._prepared = {}
+        reuse = previous._prepared if previous is not None else {}
+        self.blocks = []
+        self.block_tokens = []
+        for item in self.kb:
+            key = (item["question"], item["answer"])
+            prepared = reuse.get(key)
+            if prepared is None:
+                block = format_entry(item)
+                prepared = (block, estimate_tokens(block))
+            self._prepared[key] = prepared
+            self.blocks.append(prepared[0])
+            self.block_tokens.append(prepared[1])
+        documents = [
+            " ".join([item["question"], " ".join(item.get("keywords", [])), item["answer"]])
+            for item in self.kb
+        ]
+        self.vectorizer = TfidfVectorizer(stop_words="english", sublinear_tf=True)
+        self.matrix = self.vectorizer.fit_transform(documents) if documents else None
+
+    def top_k(self, query, k=5, token_budget=1500, min_score=0.0):
+        """Return the positions of the most relevant entries for ``query``.
+
+        At most ``k`` entries scoring above ``min_score`` are returned. An
+        entry whose formatted block would push the total past
+        ``token_budget`` tokens is skipped, the first one included. Scores
+        are cosine similarities scaled by the share of query terms the
+        knowledge base knows at all, so one shared word in an otherwise
+        unknown query scores low.
+        """
+        import numpy as np
+
+        if self.matrix is None or k <= 0:
+            return []
+        terms = self.vectorizer.build_analyzer()(query)
+        try:
+            query_vector = self.vectorizer.transform([query])
+        except ValueError:
+            return []
+        known = sum(term in self.vectorizer.vocabulary_ for term in terms)
+        coverage = known / len(terms) if terms else 0.0
+        scores = (self.matrix @ query_vector.T).toarray().ravel() * coverage
+        ranked = np.argsort(-scores, kind="stable")[:k]
+
+        selected = []
+        used = 0
+        for pos in ranked:
+            if scores[pos] <= min_score:
+                break
+            cost = self.block_tokens[pos]
+            if used + cost > token_budget:
+                continue
+            selected.append(int(pos))
+            used += cost
+        return selected
+
+    def build_context(self, positions):
+        return "\n\n".join(self.blocks[pos] for pos in positions)
@@ -0,0 +1,7 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# gchatbot exits at import without a key; tests never reach the real API.
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
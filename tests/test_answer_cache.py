@@ -0,0 +1,96 @@
+import fnmatch
+
+from answer_cache import AnswerCache, MemoryCacheStore, RedisCacheStore, create_answer_cache, normalize_query
+
+
+class FakeRedis:
+    """Dict-backed stand-in for the parts of redis-py the store uses."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode("utf-8")
+        self.ttls[key] = ex
+
+    def scan_iter(self, match):
+        return [k for k in list(self.data) if fnmatch.fnmatch(k, match)]
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+            self.ttls.pop(key, None)
+
+
+def test_normalize_query_keeps_unicode_words():
+    assert normalize_query("How do I enroll?") == normalize_query("how do i enroll")
+    assert normalize_query("Café") == "café"
+    assert normalize_query("आप कहाँ स्थित हैं?") == "आप कहाँ स्थित हैं"
+    assert normalize_query("你好") != normalize_query("आप कहाँ स्थित हैं?")
+    assert normalize_query("???") == ""
+
+
+def test_queries_without_words_are_not_cached():
+    cache = AnswerCache(MemoryCacheStore(), kb_version="v1")
+    cache.set("???", {"response": "x", "sources": []})
+    assert cache.get("???") is None
+    assert cache.get("!!!") is None
+    assert len(cache.store) == 0
+
+
+def test_memory_store_evicts_lru_and_expires():
+    now = [0.0]
+    store = MemoryCacheStore(maxsize=2, ttl=10, clock=lambda: now[0])
+    store.set("a", 1)
+    store.set("b", 2)
+    assert store.get("a") == 1
+    store.set("c", 3)
+    assert store.get("b") is None
+    assert store.get("a") == 1
+    now[0] = 11
+    assert store.get("a") is None
+
+
+def test_redis_store_get_set_with_ttl():
+    client = FakeRedis()
+    store = RedisCacheStore(client, ttl=60)
+    store.set("v1:hello", {"response": "hi", "sources": ["Q"]})
+
+    assert store.get("v1:hello") == {"response": "hi", "sources": ["Q"]}
+    assert client.ttls["gchatbot:answer:v1:hello"] == 60
+    assert store.get("v1:missing") is None
+
+
+def test_redis_store_clear_only_touches_its_prefix():
+    client = FakeRedis()
+    client.set("other:key", "{}")
+    store = RedisCacheStore(client)
+    store.set("v1:a", {"response": "a", "sources": []})
+    store.set("v1:b", {"response": "b", "sources": []})
+
+    store.clear()
+
+    assert list(client.data) == ["other:key"]
+
+
+def test_kb_version_change_invalidates_redis_entries():
+    cache = AnswerCache(RedisCacheStore(FakeRedis()), kb_version="v1")
+    cache.set("How do I enroll?", {"response": "old", "sources": []})
+    assert cache.get("how do i enroll") == {"response": "old", "sources": []}
+
+    cache.set_kb_version("v2")
+
+    assert cache.get("how do i enroll") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_redis_client_gets_socket_timeouts():
+    cache = create_answer_cache("v1", redis_url="redis://localhost:6379/0", redis_timeout=0.05)
+    kwargs = cache.store.client.connection_pool.connection_kwargs
+    assert kwargs["socket_timeout"] == 0.05
+    assert kwargs["socket_connect_timeout"] == 0.05
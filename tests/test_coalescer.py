@@ -0,0 +1,80 @@
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from coalescer import RequestCoalescer
+
+
+def run_concurrently(coalescer, key, fn, callers, timeout=1.0):
+    results = []
+    lock = threading.Lock()
+
+    def caller():
+        try:
+            outcome = coalescer.run(key, fn, timeout=timeout)
+        except BaseException as e:
+            outcome = e
+        with lock:
+            results.append(outcome)
+
+    threads = [threading.Thread(target=caller) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_duplicates_share_one_call():
+    coalescer = RequestCoalescer(max_waiters=4, max_waiters_per_key=4)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        time.sleep(0.2)
+        return "answer"
+
+    results = run_concurrently(coalescer, "k", fn, callers=4)
+
+    assert results == ["answer"] * 4
+    assert len(calls) == 1
+    assert coalescer.stats()["coalesced"] == 3
+
+
+def test_errors_reach_every_waiter():
+    coalescer = RequestCoalescer(max_waiters=4, max_waiters_per_key=4)
+
+    def fn():
+        time.sleep(0.2)
+        raise RuntimeError("upstream down")
+
+    results = run_concurrently(coalescer, "k", fn, callers=3)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_callers_past_the_cap_make_their_own_call():
+    coalescer = RequestCoalescer(max_waiters=4, max_waiters_per_key=2)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        time.sleep(0.3)
+        return "answer"
+
+    results = run_concurrently(coalescer, "k", fn, callers=5)
+
+    assert results == ["answer"] * 5
+    assert len(calls) == 3
+    assert coalescer.stats()["coalesce_overflow"] == 2
+    assert coalescer.stats()["coalesce_waiting"] == 0
+
+
+def test_waiter_timeout_does_not_stop_the_leader():
+    coalescer = RequestCoalescer()
+    results = run_concurrently(coalescer, "k", lambda: time.sleep(0.3) or "answer", callers=2, timeout=0.05)
+
+    assert "answer" in results
+    assert any(isinstance(r, FutureTimeout) for r in results)
+    assert coalescer.stats()["coalesce_waiting"] == 0
@@ -0,0 +1,245 @@
+import json
+import threading
+import time
+
+import pytest
+
+import gchatbot
+from answer_cache import create_answer_cache
+from coalescer import RequestCoalescer
+from fake_gemini import FakeGeminiModel
+from gemini_guard import CircuitBreaker, GeminiGuard
+from gemini_limiter import GeminiLimiter
+
+# Shares no words with any knowledge base entry, so it always goes to Gemini.
+QUERY = "origami volcano coaching"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(gchatbot, "answer_cache", create_answer_cache(gchatbot.kb_watcher.state.fingerprint))
+    return gchatbot.app.test_client()
+
+
+def use_gemini(monkeypatch, model, **guard_options):
+    guard = GeminiGuard(limiter=gchatbot.gemini_limiter, max_workers=2, **guard_options)
+    monkeypatch.setattr(gchatbot, "model", model)
+    monkeypatch.setattr(gchatbot, "gemini_guard", guard)
+    return guard
+
+
+def fallbacks(client):
+    return client.get("/gemini/stats").get_json()["fallbacks"]
+
+
+def stream_events(response):
+    body = response.get_data(as_text=True)
+    return [json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")]
+
+
+def test_answer_comes_from_gemini(client, monkeypatch):
+    use_gemini(monkeypatch, FakeGeminiModel(answer="From Gemini."))
+
+    body = client.post("/chat", json={"message": QUERY}).get_json()
+
+    assert body["response"] == "From Gemini."
+    assert "fallback" not in body
+    retriever = gchatbot.kb_watcher.state.retriever
+    positions = retriever.top_k(QUERY, k=gchatbot.KB_TOP_K, token_budget=gchatbot.KB_TOKEN_BUDGET)
+    assert body["sources"] == [retriever.kb[pos]["question"] for pos in positions]
+    assert body["sources"]
+
+
+def test_faq_answer_names_its_source(client, monkeypatch):
+    model = FakeGeminiModel()
+    use_gemini(monkeypatch, model)
+
+    body = client.post("/chat", json={"message": "Do you provide certification?"}).get_json()
+
+    assert body["sources"] == ["Do you provide certification?"]
+    assert model.calls == 0
+
+
+def test_deadline_falls_back(client, monkeypatch):
+    use_gemini(monkeypatch, FakeGeminiModel(latency=1.0), deadline=0.05)
+    before = fallbacks(client)
+
+    body = client.post("/chat", json={"message": QUERY}).get_json()
+
+    assert body["response"] == gchatbot.FALLBACK_MESSAGE
+    assert body["fallback"] == "deadline"
+    stats = client.get("/gemini/stats").get_json()
+    assert stats["deadline_exceeded"] == 1
+    assert stats["fallbacks"]["deadline"] == before["deadline"] + 1
+
+
+def test_open_breaker_falls_back_without_calling_gemini(client, monkeypatch):
+    model = FakeGeminiModel(error_rate=1.0)
+    use_gemini(monkeypatch, model, breaker=CircuitBreaker(failure_threshold=1))
+    before = fallbacks(client)
+
+    first = client.post("/chat", json={"message": QUERY}).get_json()
+    second = client.post("/chat", json={"message": QUERY}).get_json()
+
+    assert first["fallback"] == "error"
+    assert second["fallback"] == "breaker_open"
+    assert model.calls == 1
+    stats = client.get("/gemini/stats").get_json()
+    assert stats["breaker_state"] == CircuitBreaker.OPEN
+    assert stats["fallbacks"]["error"] == before["error"] + 1
+    assert stats["fallbacks"]["breaker_open"] == before["breaker_open"] + 1
+
+
+def test_stream_deadline_falls_back(client, monkeypatch):
+    use_gemini(monkeypatch, FakeGeminiModel(latency=1.0), deadline=0.05)
+
+    events = stream_events(client.post("/chat/stream", json={"message": QUERY}))
+
+    assert events == [{"text": gchatbot.FALLBACK_MESSAGE, "sources": [], "done": True, "fallback": "deadline"}]
+
+
+def test_stream_failure_midway_is_flagged(client, monkeypatch):
+    use_gemini(monkeypatch, FakeGeminiModel(error_rate=1.0, answer="one two three four"))
+
+    events = stream_events(client.post("/chat/stream", json={"message": QUERY}))
+
+    assert events[0] == {"text": "one "}
+    assert events[-1]["error"] is True
+
+
+def test_stream_sends_chunks_then_sources_then_caches(client, monkeypatch):
+    model = FakeGeminiModel(answer="one two three four", chunks=4)
+    use_gemini(monkeypatch, model)
+
+    events = stream_events(client.post("/chat/stream", json={"message": QUERY}))
+
+    assert [event["text"] for event in events[:-1]] == ["one ", "two ", "three ", "four "]
+    assert all(set(event) == {"text"} for event in events[:-1])
+    final = events[-1]
+    assert final["done"] is True
+    assert final["sources"]
+    assert "error" not in final and "fallback" not in final
+
+    repeat = stream_events(client.post("/chat/stream", json={"message": QUERY}))
+
+    assert repeat == [{"text": "one two three four ", "sources": final["sources"], "done": True}]
+    assert model.calls == 1
+
+
+def test_stream_faq_hit_is_one_event(client, monkeypatch):
+    model = FakeGeminiModel()
+    use_gemini(monkeypatch, model)
+
+    events = stream_events(client.post("/chat/stream", json={"message": "Do you provide certification?"}))
+
+    assert len(events) == 1
+    assert events[0]["done"] is True
+    assert events[0]["sources"] == ["Do you provide certification?"]
+    assert model.calls == 0
+
+
+def test_full_limiter_returns_503_with_retry_after(client, monkeypatch):
+    limiter = GeminiLimiter(max_concurrency=1, queue_timeout=0.01)
+    monkeypatch.setattr(gchatbot, "gemini_limiter", limiter)
+    use_gemini(monkeypatch, FakeGeminiModel())
+
+    limiter.acquire()
+    try:
+        for route in ("/chat", "/chat/stream"):
+            response = client.post(route, json={"message": QUERY})
+            assert response.status_code == 503
+            assert response.headers["Retry-After"] == "1"
+    finally:
+        limiter.release()
+
+    assert limiter.rejected == 2
+    assert client.post("/chat", json={"message": QUERY}).status_code == 200
+
+
+def test_server_timing_names_the_stages(client):
+    response = client.post("/chat", json={"message": "Do you provide certification?"})
+
+    stages = [part.split(";")[0] for part in response.headers["Server-Timing"].split(", ")]
+    assert stages[0] == "match"
+    assert stages[-1] == "total"
+
+
+def test_metrics_export_answers_stages_and_faq_ratio(client):
+    client.post("/chat", json={"message": "Do you provide certification?"})
+
+    lines = client.get("/metrics").get_data(as_text=True).splitlines()
+
+    faq = gchatbot.answers_total.value(path="faq")
+    total = sum(gchatbot.answers_total.value(path=p) for p in ("faq", "cache", "llm"))
+    assert f'chatbot_answers_total{{path="faq"}} {faq}' in lines
+    assert 'chatbot_requests_total{route="/chat",status="200"}' in " ".join(lines)
+    assert any(line.startswith('chatbot_stage_seconds_bucket{stage="match",le="+Inf"}') for line in lines)
+    assert any(line.startswith('chatbot_stage_seconds_bucket{stage="match",le="0.001"}') for line in lines)
+    assert f"chatbot_faq_hit_ratio {faq / total!r}" in lines
+
+
+def test_burst_past_the_coalescer_cap_is_still_served(client, monkeypatch):
+    monkeypatch.setattr(gchatbot, "gemini_limiter", GeminiLimiter(max_concurrency=8, queue_timeout=0.25))
+    monkeypatch.setattr(gchatbot, "gemini_coalescer", RequestCoalescer(max_waiters=4, max_waiters_per_key=4))
+    model = FakeGeminiModel(latency=0.3)
+    use_gemini(monkeypatch, model, deadline=2.0)
+    statuses = []
+
+    def ask():
+        statuses.append(gchatbot.app.test_client().post("/chat", json={"message": QUERY}).status_code)
+
+    threads = [threading.Thread(target=ask) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.005)
+    for thread in threads:
+        thread.join()
+
+    assert statuses == [200] * 12
+    assert model.calls < 12
+    stats = gchatbot.gemini_coalescer.stats()
+    assert stats["coalesced"] + stats["coalesce_overflow"] == 11
+
+
+def test_answer_started_before_a_reload_is_not_cached_for_the_new_kb(client, monkeypatch):
+    model = FakeGeminiModel(latency=0.3, answer="Old answer.")
+    use_gemini(monkeypatch, model)
+    original = gchatbot.kb_watcher.state.kb
+    edited = original + [{"question": "Is there a refund policy?", "keywords": ["refund"], "answer": "Yes."}]
+
+    thread = threading.Thread(target=lambda: client.post("/chat", json={"message": QUERY}))
+    thread.start()
+    time.sleep(0.1)
+    try:
+        gchatbot.kb_watcher.set_kb(edited)
+        thread.join()
+        model.answer = "New answer."
+
+        body = client.post("/chat", json={"message": QUERY}).get_json()
+    finally:
+        gchatbot.kb_watcher.set_kb(original)
+
+    assert body["response"] == "New answer."
+    assert model.calls == 2
+
+
+def test_coalesced_waiter_timeout_is_a_deadline_not_a_gemini_error(client, monkeypatch):
+    monkeypatch.setattr(gchatbot, "GEMINI_COALESCE_TIMEOUT", 0.05)
+    use_gemini(monkeypatch, FakeGeminiModel(latency=0.4), deadline=2.0)
+    errors = gchatbot.gemini_errors_total.value()
+    before = fallbacks(client)
+    bodies = []
+
+    def ask():
+        bodies.append(gchatbot.app.test_client().post("/chat", json={"message": QUERY}).get_json())
+
+    threads = [threading.Thread(target=ask) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join()
+
+    assert sorted(body.get("fallback", "") for body in bodies) == ["", "deadline"]
+    assert gchatbot.gemini_errors_total.value() == errors
+    assert fallbacks(client)["deadline"] == before["deadline"] + 1
@@ -0,0 +1,166 @@
+import time
+
+import pytest
+
+from fake_gemini import FakeGeminiModel, FakeGeminiTimeout
+from gemini_guard import CircuitBreaker, CircuitOpen, DeadlineExceeded, GeminiGuard, LatencyTracker
+from gemini_limiter import GeminiLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def prefilled_latencies(seconds, samples=20):
+    latencies = LatencyTracker(min_samples=samples)
+    for _ in range(samples):
+        latencies.add(seconds)
+    return latencies
+
+
+def test_breaker_opens_half_opens_and_closes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    clock.now = 30
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.opens == 2
+
+    clock.now = 60
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()["breaker_rejected"] == 1
+
+
+def test_open_breaker_skips_the_call():
+    breaker = CircuitBreaker(failure_threshold=1, clock=FakeClock())
+    breaker.record_failure()
+    guard = GeminiGuard(breaker=breaker)
+    calls = []
+
+    with pytest.raises(CircuitOpen):
+        guard.call(lambda: calls.append(1))
+    assert calls == []
+
+
+def test_hedge_fires_at_observed_p95():
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(1.0)
+            return "slow"
+        return "fast"
+
+    guard = GeminiGuard(hedge=True, hedge_delay=5.0, min_hedge_delay=0.01, latencies=prefilled_latencies(0.05))
+    start = time.monotonic()
+
+    assert guard.call(fn) == "fast"
+    assert time.monotonic() - start < 0.5
+    assert guard.stats()["hedges"] == 1
+
+
+def test_early_failure_is_retried():
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("upstream reset")
+        return "ok"
+
+    guard = GeminiGuard(hedge=True, hedge_delay=5.0)
+
+    assert guard.call(fn) == "ok"
+    assert len(calls) == 2
+    assert guard.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_hedge_is_skipped_without_a_free_slot():
+    limiter = GeminiLimiter(max_concurrency=1)
+    guard = GeminiGuard(hedge=True, min_hedge_delay=0.01, latencies=prefilled_latencies(0.01), limiter=limiter)
+
+    assert guard.call(lambda: time.sleep(0.1) or "ok") == "ok"
+    assert guard.stats()["hedges_skipped"] == 1
+
+
+def test_deadline_exceeded_counts_as_a_failure():
+    limiter = GeminiLimiter(max_concurrency=1)
+    guard = GeminiGuard(deadline=0.05, limiter=limiter)
+
+    with pytest.raises(DeadlineExceeded):
+        guard.call(lambda: time.sleep(0.3))
+    assert guard.stats()["deadline_exceeded"] == 1
+    assert guard.breaker.failures == 1
+    # The abandoned call keeps its slot until it actually finishes.
+    assert limiter.in_flight == 1
+    time.sleep(0.4)
+    assert limiter.in_flight == 0
+
+
+def test_stream_deadline_covers_the_first_chunk():
+    model = FakeGeminiModel(latency=0.8, chunks=4)
+    limiter = GeminiLimiter(max_concurrency=1)
+    guard = GeminiGuard(deadline=0.05, limiter=limiter)
+
+    with pytest.raises(DeadlineExceeded):
+        list(guard.stream(lambda: model.generate_content("prompt", stream=True)))
+    assert guard.stats()["deadline_exceeded"] == 1
+    assert limiter.in_flight == 1
+    time.sleep(0.3)
+    assert limiter.in_flight == 0
+
+
+def test_stream_yields_every_chunk():
+    model = FakeGeminiModel(chunks=4, answer="one two three four")
+    guard = GeminiGuard(deadline=1.0, limiter=GeminiLimiter(max_concurrency=1))
+
+    chunks = list(guard.stream(lambda: model.generate_content("prompt", stream=True)))
+
+    assert "".join(chunk.text for chunk in chunks) == "one two three four "
+    assert guard.limiter.in_flight == 0
+    assert guard.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_fake_honours_request_timeout():
+    model = FakeGeminiModel(latency=1.0)
+    start = time.monotonic()
+
+    with pytest.raises(FakeGeminiTimeout):
+        model.generate_content("prompt", request_options={"timeout": 0.05})
+    assert time.monotonic() - start < 0.5
+
+
+def test_fake_stream_timeout_bounds_the_whole_stream():
+    model = FakeGeminiModel(latency=0.4, chunks=4, answer="one two three four")
+    chunks = []
+
+    with pytest.raises(FakeGeminiTimeout):
+        for chunk in model.generate_content("prompt", stream=True, request_options={"timeout": 0.25}):
+            chunks.append(chunk)
+    assert len(chunks) == 2
+
+
+def test_stream_deadline_applies_to_gaps_not_the_total():
+    model = FakeGeminiModel(latency=0.4, chunks=4, answer="one two three four")
+    guard = GeminiGuard(deadline=0.2)
+
+    chunks = list(guard.stream(lambda: model.generate_content("prompt", stream=True)))
+
+    assert len(chunks) == 4
+    assert guard.stats()["deadline_exceeded"] == 0
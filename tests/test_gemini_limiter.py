@@ -0,0 +1,23 @@
+import pytest
+
+from gemini_limiter import GeminiBusy, GeminiLimiter
+
+
+def test_full_limiter_rejects_after_the_queue_timeout():
+    limiter = GeminiLimiter(max_concurrency=1, queue_timeout=0.01)
+    limiter.acquire()
+
+    with pytest.raises(GeminiBusy):
+        limiter.acquire()
+    assert not limiter.try_acquire()
+    assert limiter.stats() == {"max_concurrency": 1, "in_flight": 1, "rejected": 1}
+
+
+def test_slot_is_released_on_error():
+    limiter = GeminiLimiter(max_concurrency=1)
+
+    with pytest.raises(RuntimeError):
+        with limiter.slot():
+            raise RuntimeError("upstream down")
+    assert limiter.in_flight == 0
+    assert limiter.try_acquire()
@@ -0,0 +1,62 @@
+import pytest
+
+from Knowledge_Base import load_knowledge_base
+from kb_index import KeywordIndex, tokenize
+
+KB = load_knowledge_base()
+
+
+@pytest.fixture(scope="module")
+def index():
+    return KeywordIndex(KB)
+
+
+def best_question(index, query):
+    match = index.best_match(query)
+    return match[0]["question"] if match else None
+
+
+def test_every_exact_question_finds_its_own_entry(index):
+    for faq in KB:
+        assert best_question(index, faq["question"]) == faq["question"]
+
+
+@pytest.mark.parametrize("query, question", [
+    ("How can I contact My Corporate School?", "How can I contact My Corporate School?"),
+    ("Is placement assistance available?", "Is placement assistance available?"),
+    ("Who should attend the Campus to Corporate program?", "Who should attend the Campus to Corporate program?"),
+    ("Can corporate training be customized?", "Can corporate training be customized?"),
+    ("hi, how can I contact my corporate school please", "How can I contact My Corporate School?"),
+])
+def test_whole_question_beats_list_order(index, query, question):
+    assert best_question(index, query) == question
+
+
+@pytest.mark.parametrize("query", ["what is the refund policy", "what about pricing", "where do I pay"])
+def test_stopword_phrases_alone_do_not_match(index, query):
+    assert index.best_match(query) is None
+
+
+def test_ties_go_to_the_earlier_entry():
+    kb = [
+        {"question": "How can I enroll in a course?", "keywords": ["enroll"], "answer": "first"},
+        {"question": "How do I enroll in a program?", "keywords": ["enroll"], "answer": "second"},
+    ]
+    faq, score = KeywordIndex(kb).best_match("enroll")
+
+    assert faq["answer"] == "first"
+    assert KeywordIndex(kb).scores("enroll") == {0: score, 1: score}
+
+
+def test_higher_score_beats_list_order():
+    kb = [
+        {"question": "Do you offer courses?", "keywords": ["courses"], "answer": "first"},
+        {"question": "Are the courses online?", "keywords": ["courses", "online"], "answer": "second"},
+    ]
+
+    assert KeywordIndex(kb).best_match("online courses")[0]["answer"] == "second"
+
+
+def test_tokenize_folds_case_width_and_plurals():
+    assert tokenize("ＣＯＵＲＳＥＳ offered") == ["course", "offered"]
+    assert tokenize("पाठ्यक्रम क्या है") == ["पाठ्यक्रम", "क्या", "है"]
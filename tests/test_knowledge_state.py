@@ -0,0 +1,64 @@
+import json
+import time
+
+from knowledge_state import KnowledgeWatcher
+from Knowledge_Base import load_knowledge_base
+
+KB = [
+    {"question": "How can I enroll in a course?", "keywords": ["enroll"], "answer": "Use the course page."},
+    {"question": "Do you provide placement assistance?", "keywords": ["placement"], "answer": "Yes."},
+]
+
+
+def write_kb(path, kb):
+    path.write_text(json.dumps(kb), encoding="utf-8")
+
+
+def test_reload_swaps_state_and_reuses_unchanged_entries(tmp_path):
+    path = tmp_path / "kb.json"
+    write_kb(path, KB)
+    changes = []
+    watcher = KnowledgeWatcher(str(path), load_knowledge_base, on_change=changes.append, interval=0)
+    old = watcher.state
+    old_retriever = old.retriever
+
+    edited = KB + [{"question": "Where are you located?", "keywords": ["location"], "answer": "Online."}]
+    write_kb(path, edited)
+    assert watcher.reload()
+
+    new = watcher.state
+    assert changes == [new]
+    assert new.index.best_match("placement")[0]["answer"] == "Yes."
+    assert new.index.best_match("location")[0]["answer"] == "Online."
+    # Unchanged entries keep their tokenized keywords and formatted blocks.
+    key = (KB[0]["question"], tuple(KB[0]["keywords"]))
+    assert new.index._prepared[key] is old.index._prepared[key]
+    new.retriever
+    assert new.retriever.blocks[0] is old_retriever.blocks[0]
+
+
+def test_reload_warms_the_retriever_in_the_background(tmp_path):
+    path = tmp_path / "kb.json"
+    write_kb(path, KB)
+    watcher = KnowledgeWatcher(str(path), load_knowledge_base, interval=0)
+
+    watcher.set_kb(KB[:1])
+
+    for _ in range(200):
+        if watcher.state._retriever is not None:
+            break
+        time.sleep(0.01)
+    assert watcher.state._retriever is not None
+
+
+def test_broken_file_keeps_the_current_version(tmp_path):
+    path = tmp_path / "kb.json"
+    write_kb(path, KB)
+    watcher = KnowledgeWatcher(str(path), load_knowledge_base, interval=0)
+    state = watcher.state
+
+    path.write_text("{broken", encoding="utf-8")
+
+    assert not watcher.reload()
+    assert watcher.state is state
+    assert watcher.errors == 1
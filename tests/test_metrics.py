@@ -0,0 +1,40 @@
+from metrics import Registry
+
+
+def test_counter_renders_each_label_set():
+    registry = Registry()
+    answers = registry.counter("answers_total", "Answers by path.", ["path"])
+    answers.inc(path="faq")
+    answers.inc(path="faq")
+    answers.inc(path="llm")
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE answers_total counter" in lines
+    assert 'answers_total{path="faq"} 2' in lines
+    assert 'answers_total{path="llm"} 1' in lines
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram("stage_seconds", "Stage time.", ["stage"], buckets=(0.1, 1))
+    latency.observe(0.05, stage="match")
+    latency.observe(0.5, stage="match")
+    latency.observe(5, stage="match")
+
+    lines = registry.render().splitlines()
+
+    assert 'stage_seconds_bucket{stage="match",le="0.1"} 1' in lines
+    assert 'stage_seconds_bucket{stage="match",le="1"} 2' in lines
+    assert 'stage_seconds_bucket{stage="match",le="+Inf"} 3' in lines
+    assert 'stage_seconds_sum{stage="match"} 5.55' in lines
+    assert 'stage_seconds_count{stage="match"} 3' in lines
+
+
+def test_callback_is_read_at_render_time():
+    registry = Registry()
+    state = {"value": 1}
+    registry.callback("in_flight", "In flight.", lambda: state["value"])
+    state["value"] = 3
+
+    assert "in_flight 3" in registry.render().splitlines()
@@ -0,0 +1,54 @@
+from retrieval import KnowledgeRetriever, estimate_tokens, format_entry
+
+KB = [
+    {"question": "Do you provide placement assistance?", "keywords": ["placement"], "answer": "Yes, placement help."},
+    {"question": "What is Life Coaching?", "keywords": ["life coaching"], "answer": "Coaching for life goals."},
+    {"question": "Who is Executive Coaching for?", "keywords": ["executive"], "answer": "Managers and leaders."},
+    {"question": "Where are your sessions conducted?", "keywords": ["location"], "answer": "Online and on site."},
+]
+
+
+def test_most_relevant_entry_comes_first():
+    retriever = KnowledgeRetriever(KB)
+
+    positions = retriever.top_k("life coaching goals", k=2)
+
+    assert positions[0] == 1
+    assert 2 in positions
+
+
+def test_k_limits_the_entries():
+    retriever = KnowledgeRetriever(KB)
+
+    assert len(retriever.top_k("coaching", k=1)) == 1
+    assert retriever.top_k("coaching", k=0) == []
+
+
+def test_unrelated_query_finds_nothing():
+    assert KnowledgeRetriever(KB).top_k("origami volcano") == []
+
+
+def test_token_budget_cuts_off_later_entries():
+    retriever = KnowledgeRetriever(KB)
+    first = estimate_tokens(format_entry(KB[1]))
+
+    assert retriever.top_k("life coaching", k=5, token_budget=first) == [1]
+
+
+def test_oversized_entry_is_skipped_even_when_first():
+    kb = KB + [{"question": "What is Coaching?", "keywords": [], "answer": "coaching " * 400}]
+    retriever = KnowledgeRetriever(kb)
+
+    positions = retriever.top_k("what is coaching", k=5, token_budget=100)
+
+    assert 4 not in positions
+    assert positions
+    assert sum(retriever.block_tokens[pos] for pos in positions) <= 100
+
+
+def test_min_score_drops_weak_matches():
+    retriever = KnowledgeRetriever(KB)
+
+    assert retriever.top_k("origami volcano coaching", k=1)
+    assert retriever.top_k("origami volcano coaching", k=1, min_score=0.2) == []
+    assert retriever.top_k("life coaching", k=1, min_score=0.2) == [1]